@@ -2,16 +2,33 @@
 CourtListener API client for MCP server.
 """
 
+import asyncio
+import math
 import os
 import re
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from html import unescape
 from functools import lru_cache
+from typing import Any
 
 import httpx
+import orjson
 
 BASE_URL = "https://www.courtlistener.com/api/rest/v4/"
 SEARCH_URL = "https://www.courtlistener.com/api/rest/v3/search/"
 
+# Only request the search fields we actually read; the API ignores unknown selections
+SEARCH_FIELDS = "caseName,citation,dateFiled,court,cluster_id,id,snippet"
+CITATION_FIELDS = "caseName,citation,dateFiled,court,cluster_id,id"
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_NON_TEXT_RE = re.compile(r"<!--.*?-->|<(script|style)\b.*?</\1\s*>", re.DOTALL | re.IGNORECASE)
+_CITE_RE = re.compile(r"(\d+)\s+([A-Za-z\.\s]+?)\s+(\d+)")
+
 
 def get_api_token() -> str:
     """Get the API token from environment variable."""
@@ -24,8 +41,9 @@ def get_api_token() -> str:
     return token
 
 
+@lru_cache(maxsize=1)
 def get_headers() -> dict[str, str]:
-    """Get headers for authenticated API requests."""
+    """Get headers for authenticated API requests (built once, on first use)."""
     return {
         "Authorization": f"Token {get_api_token()}",
         "Content-Type": "application/json",
@@ -36,10 +54,151 @@ def strip_html(text: str) -> str:
     """Remove HTML tags and decode entities."""
     if not text:
         return ""
-    text = re.sub(r"<[^>]+>", "", text)
+    # Skip the tag pass entirely for text that contains no markup
+    if "<" in text:
+        text = _TAG_RE.sub("", text)
     text = unescape(text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    # split()/join() collapses and trims whitespace in a single C-level pass.
+    return " ".join(text.split())
+
+
+def strip_html_document(text: str) -> str:
+    """Like strip_html, but also drops comments and script/style bodies from full documents."""
+    if not text:
+        return ""
+    return strip_html(_NON_TEXT_RE.sub("", text))
+
+
+def count_words(text: str, normalized: bool = False) -> int:
+    """
+    Count whitespace-separated words.
+
+    Args:
+        text: Text to count
+        normalized: True if the text came from strip_html, i.e. words are
+            separated by single spaces with no leading or trailing whitespace;
+            these are counted without building a list of words
+    """
+    if not text:
+        return 0
+    if normalized:
+        return text.count(" ") + 1
+    return len(text.split())
+
+
+def _is_reporter_token(token: str) -> bool:
+    """True for a reporter abbreviation piece such as "U.S.", "F.3d" or "2d"."""
+    return any(c.isalpha() for c in token) and all(c.isalnum() or c == "." for c in token)
+
+
+def parse_citation(citation: str) -> tuple[str, str, str] | None:
+    """
+    Split a citation like "410 U.S. 113" into (volume, reporter, page).
+
+    A bare citation is parsed with a plain token scan; anything else (e.g. a
+    citation embedded in a case name, a pin cite, or a parallel cite) falls
+    back to searching with _CITE_RE.
+    """
+    tokens = citation.split()
+    if (
+        len(tokens) >= 3
+        and tokens[0].isdecimal()
+        and tokens[-1].isdecimal()
+        and all(_is_reporter_token(token) for token in tokens[1:-1])
+    ):
+        return tokens[0], " ".join(tokens[1:-1]), tokens[-1]
+
+    match = _CITE_RE.search(citation)
+    if match:
+        return match.group(1), match.group(2).strip(), match.group(3)
+    return None
+
+
+def _lru_get(cache: OrderedDict, key):
+    """Return a cached value (or None), marking it most recently used."""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache: OrderedDict, key, value, maxsize: int):
+    """Store a value, evicting the least recently used entries beyond maxsize."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > maxsize:
+        cache.popitem(last=False)
+
+
+def _copy_courts(result: dict) -> dict:
+    """Copy a cached court list so callers can't mutate the cache."""
+    return {
+        **result,
+        "courts": [dict(court) for court in result["courts"]],
+        "shortcuts": dict(result["shortcuts"]),
+    }
+
+
+@dataclass(slots=True)
+class SearchHit:
+    """A single search result; serialized by orjson as a JSON object."""
+
+    case_name: str | None
+    citation: str | None
+    date_filed: str | None
+    court: str | None
+    cluster_id: int | None
+    opinion_id: int | None
+    snippet: str
+    url: str
+
+
+@dataclass(slots=True)
+class CitationMatch:
+    """A case matching a citation lookup; serialized by orjson as a JSON object."""
+
+    case_name: str | None
+    citation: list[str]
+    date_filed: str | None
+    court: str | None
+    cluster_id: int | None
+    opinion_id: int | None
+    url: str
+
+
+def _coalesce(
+    inflight: dict,
+    key,
+    coro_factory: Callable[[], Awaitable],
+    on_done: Callable[[Any], None] | None = None,
+) -> Awaitable:
+    """
+    Share one task between concurrent callers asking for the same key.
+
+    Args:
+        inflight: Map of keys to tasks still running
+        key: Identifies the work being requested
+        coro_factory: Starts the work when nothing is in flight for key
+        on_done: Called with the result once the work succeeds
+
+    Returns:
+        A shielded awaitable, so one caller being cancelled doesn't cancel the others
+    """
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(coro_factory())
+        inflight[key] = task
+
+        def done(task: asyncio.Task):
+            inflight.pop(key, None)
+            if task.cancelled():
+                return
+            # Also marks the exception retrieved even if every caller was cancelled
+            if task.exception() is None and on_done is not None:
+                on_done(task.result())
+
+        task.add_done_callback(done)
+    return asyncio.shield(task)
 
 
 # Court shortcuts for common queries
@@ -62,6 +221,7 @@ COURT_SHORTCUTS = {
 }
 
 
+@lru_cache(maxsize=128)
 def resolve_court(court: str) -> str:
     """Resolve court shortcut to CourtListener court ID."""
     return COURT_SHORTCUTS.get(court.lower(), court.lower())
@@ -70,15 +230,37 @@ def resolve_court(court: str) -> str:
 class CourtListenerClient:
     """Async client for CourtListener API."""
 
+    # Number of opinion -> cluster mappings remembered from search results
+    OPINION_CLUSTER_CACHE_SIZE = 1024
+    # Number of fetched opinions kept in memory
+    OPINION_CACHE_SIZE = 64
+    # Upper bound on concurrent page requests while paginating
+    MAX_CONCURRENT_PAGES = 10
+    # Seconds before the cached court list is fetched again
+    COURTS_CACHE_TTL = 86400.0
+
     def __init__(self):
         self._client: httpx.AsyncClient | None = None
+        self._opinion_clusters: OrderedDict[int, int] = OrderedDict()
+        self._courts_cache: tuple[float, dict] | None = None
+        self._opinion_cache: OrderedDict[int, dict] = OrderedDict()
+        self._opinion_inflight: dict[int, asyncio.Task] = {}
+        self._opinion_pdf_cache: OrderedDict[int, dict] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task] = {}
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
             self._client = httpx.AsyncClient(
+                base_url=BASE_URL,
                 headers=get_headers(),
                 timeout=30.0,
                 follow_redirects=True,
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=300.0,
+                ),
             )
         return self._client
 
@@ -89,16 +271,37 @@ class CourtListenerClient:
 
     async def _request(
         self,
-        endpoint: str,
+        endpoint: str | httpx.URL,
         params: dict | None = None,
-        base_url: str = BASE_URL,
     ) -> dict:
-        """Make an authenticated GET request."""
+        """
+        Make an authenticated GET request, sharing identical requests already in flight.
+
+        The endpoint is resolved against BASE_URL unless it is an absolute URL.
+        """
+        key = (endpoint, frozenset(params.items()) if params else frozenset())
+        return await _coalesce(self._inflight, key, lambda: self._get_json(endpoint, params))
+
+    async def _get_json(self, endpoint: str | httpx.URL, params: dict | None) -> dict:
         client = await self._get_client()
-        url = f"{base_url}{endpoint}"
-        response = await client.get(url, params=params)
+        response = await client.get(endpoint, params=params)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
+
+    def _remember_cluster(self, opinion_id: int | None, cluster_id: int | None):
+        """Record which cluster an opinion belongs to, evicting the oldest entries."""
+        if opinion_id is None or cluster_id is None:
+            return
+        _lru_put(self._opinion_clusters, opinion_id, cluster_id, self.OPINION_CLUSTER_CACHE_SIZE)
+
+    def _remember_pdf_info(self, opinion_id: int, data: dict) -> dict:
+        """Cache the PDF fields of an opinion payload."""
+        pdf_info = {
+            "download_url": data.get("download_url"),
+            "page_count": data.get("page_count"),
+        }
+        _lru_put(self._opinion_pdf_cache, opinion_id, pdf_info, self.OPINION_CACHE_SIZE)
+        return pdf_info
 
     async def search_opinions(
         self,
@@ -121,12 +324,13 @@ class CourtListenerClient:
             semantic: Use semantic search instead of keyword search
 
         Returns:
-            Search results with case metadata
+            Search results with case metadata; "results" holds SearchHit objects
         """
         params = {
             "q": query,
             "type": "o",
             "order_by": "score desc",
+            "fields": SEARCH_FIELDS,
         }
 
         if semantic:
@@ -138,23 +342,24 @@ class CourtListenerClient:
         if date_before:
             params["filed_before"] = date_before
 
-        client = await self._get_client()
-        response = await client.get(SEARCH_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = await self._request(SEARCH_URL, params)
 
         results = []
-        for item in data.get("results", [])[:limit]:
-            results.append({
-                "case_name": item.get("caseName"),
-                "citation": item.get("citation", [None])[0] if item.get("citation") else None,
-                "date_filed": item.get("dateFiled"),
-                "court": item.get("court"),
-                "cluster_id": item.get("cluster_id"),
-                "opinion_id": item.get("id"),
-                "snippet": strip_html(item.get("snippet", "")),
-                "url": f"https://www.courtlistener.com/opinion/{item.get('cluster_id')}/",
-            })
+        for item in (data.get("results") or ())[:limit]:
+            opinion_id = item.get("id")
+            cluster_id = item.get("cluster_id")
+            citations = item.get("citation")
+            self._remember_cluster(opinion_id, cluster_id)
+            results.append(SearchHit(
+                case_name=item.get("caseName"),
+                citation=citations[0] if citations else None,
+                date_filed=item.get("dateFiled"),
+                court=item.get("court"),
+                cluster_id=cluster_id,
+                opinion_id=opinion_id,
+                snippet=strip_html(item.get("snippet", "")),
+                url=f"https://www.courtlistener.com/opinion/{cluster_id}/",
+            ))
 
         return {
             "count": data.get("count", 0),
@@ -173,21 +378,89 @@ class CourtListenerClient:
         Returns:
             Opinion data including full text
         """
-        data = await self._request(f"opinions/{opinion_id}/")
+        cached = _lru_get(self._opinion_cache, opinion_id)
+        if cached is not None:
+            return dict(cached)
+
+        # Concurrent requests for the same opinion share a single fetch
+        opinion = await _coalesce(
+            self._opinion_inflight,
+            opinion_id,
+            lambda: self._fetch_opinion(opinion_id),
+            on_done=lambda result: _lru_put(
+                self._opinion_cache, opinion_id, result, self.OPINION_CACHE_SIZE
+            ),
+        )
+        return dict(opinion)
+
+    async def get_opinions(self, opinion_ids: list[int]) -> dict:
+        """
+        Fetch several opinions concurrently.
+
+        Args:
+            opinion_ids: The opinion IDs
+
+        Returns:
+            Opinion data for each ID, in order; failed fetches carry an error message
+        """
+        results = await asyncio.gather(
+            *(self.get_opinion(opinion_id) for opinion_id in opinion_ids),
+            return_exceptions=True,
+        )
+
+        opinions = []
+        for opinion_id, result in zip(opinion_ids, results):
+            if isinstance(result, Exception):
+                opinions.append({"opinion_id": opinion_id, "error": str(result)})
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                opinions.append(result)
+
+        return {
+            "count": len(opinions),
+            "opinions": opinions,
+        }
+
+    async def _fetch_opinion(self, opinion_id: int) -> dict:
+        """Fetch an opinion and its cluster from the API."""
+        # If a previous search told us the cluster, fetch it alongside the opinion
+        cluster_data = None
+        known_cluster_id = _lru_get(self._opinion_clusters, opinion_id)
+        if known_cluster_id is not None:
+            data, cluster_data = await asyncio.gather(
+                self._request(f"opinions/{opinion_id}/"),
+                self._request(f"clusters/{known_cluster_id}/"),
+                return_exceptions=True,
+            )
+            if isinstance(data, BaseException):
+                raise data
+            if isinstance(cluster_data, BaseException):
+                cluster_data = None
+        else:
+            data = await self._request(f"opinions/{opinion_id}/")
+
+        # The same payload answers a later get_opinion_pdf without another request
+        self._remember_pdf_info(opinion_id, data)
 
         # Get cluster for metadata
-        cluster_data = {}
         if data.get("cluster"):
-            cluster_id = data["cluster"].rstrip("/").split("/")[-1]
-            cluster_data = await self._request(f"clusters/{cluster_id}/")
+            cluster_url = data["cluster"].rstrip("/")
+            cluster_id = cluster_url[cluster_url.rfind("/") + 1:]
+            if cluster_data is None or str(cluster_data.get("id")) != cluster_id:
+                cluster_data = await self._request(f"clusters/{cluster_id}/")
+        elif cluster_data is None:
+            cluster_data = {}
 
         # Extract text
         text = ""
+        normalized = False
         for field in ["html_with_citations", "html", "html_lawbox", "plain_text"]:
             if data.get(field):
                 text = data[field]
                 if field.startswith("html"):
-                    text = strip_html(text)
+                    text = strip_html_document(text)
+                    normalized = True
                 break
 
         return {
@@ -201,7 +474,7 @@ class CourtListenerClient:
             "cluster_id": cluster_data.get("id"),
             "syllabus": strip_html(cluster_data.get("syllabus", "")),
             "text": text,
-            "word_count": len(text.split()) if text else 0,
+            "word_count": count_words(text, normalized),
             "url": f"https://www.courtlistener.com/opinion/{cluster_data.get('id')}/",
         }
 
@@ -213,14 +486,13 @@ class CourtListenerClient:
             citation: Legal citation (e.g., "410 U.S. 113")
 
         Returns:
-            Matching case details
+            Matching case details; "matches" holds CitationMatch objects
         """
-        # Parse citation pattern
-        pattern = r"(\d+)\s+([A-Za-z\.\s]+?)\s+(\d+)"
-        match = re.search(pattern, citation)
+        parsed = parse_citation(citation)
 
-        if match:
-            query = f'citation:"{match.group(1)} {match.group(2).strip()} {match.group(3)}"'
+        if parsed:
+            volume, reporter, page = parsed
+            query = f'citation:"{volume} {reporter} {page}"'
         else:
             query = f'"{citation}"'
 
@@ -228,12 +500,10 @@ class CourtListenerClient:
             "q": query,
             "type": "o",
             "order_by": "score desc",
+            "fields": CITATION_FIELDS,
         }
 
-        client = await self._get_client()
-        response = await client.get(SEARCH_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = await self._request(SEARCH_URL, params)
 
         results = data.get("results", [])
         if not results:
@@ -245,15 +515,18 @@ class CourtListenerClient:
 
         matches = []
         for item in results[:5]:
-            matches.append({
-                "case_name": item.get("caseName"),
-                "citation": item.get("citation", []),
-                "date_filed": item.get("dateFiled"),
-                "court": item.get("court"),
-                "cluster_id": item.get("cluster_id"),
-                "opinion_id": item.get("id"),
-                "url": f"https://www.courtlistener.com/opinion/{item.get('cluster_id')}/",
-            })
+            opinion_id = item.get("id")
+            cluster_id = item.get("cluster_id")
+            self._remember_cluster(opinion_id, cluster_id)
+            matches.append(CitationMatch(
+                case_name=item.get("caseName"),
+                citation=item.get("citation", []),
+                date_filed=item.get("dateFiled"),
+                court=item.get("court"),
+                cluster_id=cluster_id,
+                opinion_id=opinion_id,
+                url=f"https://www.courtlistener.com/opinion/{cluster_id}/",
+            ))
 
         return {
             "found": True,
@@ -273,9 +546,12 @@ class CourtListenerClient:
         Returns:
             Dict with PDF URL and download status
         """
-        data = await self._request(f"opinions/{opinion_id}/")
+        pdf_info = _lru_get(self._opinion_pdf_cache, opinion_id)
+        if pdf_info is None:
+            data = await self._request(f"opinions/{opinion_id}/")
+            pdf_info = self._remember_pdf_info(opinion_id, data)
 
-        pdf_url = data.get("download_url")
+        pdf_url = pdf_info["download_url"]
         if not pdf_url:
             return {
                 "opinion_id": opinion_id,
@@ -287,20 +563,32 @@ class CourtListenerClient:
             "opinion_id": opinion_id,
             "has_pdf": True,
             "pdf_url": pdf_url,
-            "page_count": data.get("page_count"),
+            "page_count": pdf_info["page_count"],
         }
 
         # Download if path provided
         if save_path:
             client = await self._get_client()
-            response = await client.get(pdf_url)
-            response.raise_for_status()
-
-            with open(save_path, "wb") as f:
-                f.write(response.content)
+            size = 0
+            # Stream into a temporary file so a failed download never leaves a truncated PDF
+            # A unique temp file beside the target never clobbers an existing file
+            fd, part_path = tempfile.mkstemp(
+                dir=os.path.dirname(save_path) or ".", suffix=".part"
+            )
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    async with client.stream("GET", pdf_url) as response:
+                        response.raise_for_status()
+                        async for chunk in response.aiter_bytes(chunk_size=65536):
+                            f.write(chunk)
+                            size += len(chunk)
+                os.replace(part_path, save_path)
+            except BaseException:
+                os.remove(part_path)
+                raise
 
             result["saved_to"] = save_path
-            result["file_size_bytes"] = len(response.content)
+            result["file_size_bytes"] = size
 
         return result
 
@@ -311,15 +599,46 @@ class CourtListenerClient:
         Returns:
             Dictionary of court IDs and names
         """
-        courts = []
-        url = f"{BASE_URL}courts/"
-
-        client = await self._get_client()
-        while url:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
+        if self._courts_cache is not None:
+            fetched_at, cached = self._courts_cache
+            if time.monotonic() - fetched_at < self.COURTS_CACHE_TTL:
+                return _copy_courts(cached)
+
+        # v4 reports count as a URL unless asked to inline it
+        first = await self._request("courts/", {"count": "on"})
+        pages = [first]
+
+        next_url = first.get("next")
+        page_size = len(first.get("results", []))
+        count = first.get("count")
+        if (
+            next_url
+            and "page" in httpx.URL(next_url).params
+            and isinstance(count, int)
+            and page_size
+        ):
+            # Page-number pagination: every page URL is known up front, so fetch them concurrently
+            # Later pages don't need the count query repeated
+            next_url = httpx.URL(next_url).copy_remove_param("count")
+            last_page = math.ceil(count / page_size)
+            semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_PAGES)
+
+            async def fetch_page(page: int) -> dict:
+                async with semaphore:
+                    return await self._request(next_url.copy_set_param("page", page))
+
+            pages.extend(await asyncio.gather(
+                *(fetch_page(page) for page in range(2, last_page + 1))
+            ))
+        else:
+            # Cursor pagination (or no usable count): each page only reveals the next one
+            while next_url:
+                data = await self._request(next_url)
+                pages.append(data)
+                next_url = data.get("next")
 
+        courts = []
+        for data in pages:
             for court in data.get("results", []):
                 courts.append({
                     "id": court["id"],
@@ -328,10 +647,20 @@ class CourtListenerClient:
                     "jurisdiction": court.get("jurisdiction"),
                 })
 
-            url = data.get("next")
-
-        return {
+        result = {
             "count": len(courts),
             "courts": courts,
             "shortcuts": COURT_SHORTCUTS,
         }
+        self._courts_cache = (time.monotonic(), result)
+        return _copy_courts(result)
+
+    async def refresh_courts(self) -> dict:
+        """
+        Discard the cached court list and fetch it again.
+
+        Returns:
+            Dictionary of court IDs and names
+        """
+        self._courts_cache = None
+        return await self.list_courts()
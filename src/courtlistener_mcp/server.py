@@ -7,9 +7,10 @@ and looking up legal citations via the CourtListener API.
 """
 
 import asyncio
-import json
 import logging
 
+import orjson
+
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent
@@ -24,6 +25,17 @@ logger = logging.getLogger(__name__)
 server = Server("courtlistener")
 client = CourtListenerClient()
 
+# Results carrying more opinion text than this are emitted without indentation
+INDENT_TEXT_LIMIT = 4096
+
+
+def _dump(result: dict) -> str:
+    """Serialize a tool result, pretty-printing only small payloads."""
+    opinions = result.get("opinions") or (result,)
+    text_size = sum(len(opinion.get("text") or "") for opinion in opinions)
+    option = orjson.OPT_INDENT_2 if text_size < INDENT_TEXT_LIMIT else 0
+    return orjson.dumps(result, default=str, option=option).decode()
+
 
 @server.list_tools()
 async def list_tools():
@@ -48,6 +60,9 @@ async def call_tool(name: str, arguments: dict):
         elif name == "get_opinion":
             result = await client.get_opinion(arguments["opinion_id"])
 
+        elif name == "get_opinions":
+            result = await client.get_opinions(arguments["opinion_ids"][:10])
+
         elif name == "lookup_citation":
             result = await client.lookup_citation(arguments["citation"])
 
@@ -63,7 +78,7 @@ async def call_tool(name: str, arguments: dict):
         else:
             return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
-        return [TextContent(type="text", text=json.dumps(result, indent=2, default=str))]
+        return [TextContent(type="text", text=_dump(result))]
 
     except Exception as e:
         logger.error(f"Tool error: {e}")
@@ -82,7 +97,13 @@ async def run():
 
 def main():
     """Entry point."""
-    asyncio.run(run())
+    # Use the libuv-based event loop when the optional uvloop extra is installed
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(run())
+    else:
+        uvloop.run(run())
 
 
 if __name__ == "__main__":
@@ -69,6 +69,25 @@ TOOLS = [
             "required": ["opinion_id"],
         },
     ),
+    Tool(
+        name="get_opinions",
+        description=(
+            "Fetch the full text of several court opinions at once. Use this instead of "
+            "repeated get_opinion calls when reading multiple search results."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "opinion_ids": {
+                    "type": "array",
+                    "items": {"type": "integer"},
+                    "description": "Opinion IDs from search results (max: 10)",
+                    "maxItems": 10,
+                },
+            },
+            "required": ["opinion_ids"],
+        },
+    ),
     Tool(
         name="lookup_citation",
         description=(